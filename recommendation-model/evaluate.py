@@ -0,0 +1,240 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+import final
+import precompute
+
+# =============================================================================
+# Synthetic Preference Profiles
+# =============================================================================
+
+def genre_matrix(df):
+    """
+    Return an (items x genres) boolean matrix over precompute.GENRE_KEYWORDS.
+    """
+    column = {genre: i for i, genre in enumerate(precompute.GENRE_KEYWORDS)}
+    matrix = np.zeros((len(df), len(column)), dtype=bool)
+    for row, genres in enumerate(df['genres']):
+        for genre in genres:
+            if genre in column:
+                matrix[row, column[genre]] = True
+    return matrix
+
+def generate_profiles(df, genres, count, max_genres=2, seed=0):
+    """
+    Sample preference profiles from the catalog's own type, country, genre
+    and runtime distributions.
+
+    Returns:
+        dict: Parallel arrays 'type', 'country', 'runtime' and 'genres' (an
+        (n x genres) boolean mask), plus 'genre_lists' for the rankers.
+    """
+    rng = np.random.default_rng(seed)
+
+    type_counts = df['type'].value_counts()
+    types = rng.choice(precompute.USER_TYPES, size=count,
+                       p=type_counts.reindex(precompute.USER_TYPES, fill_value=0).to_numpy() / type_counts.sum())
+
+    country_counts = np.array([df['production_countries'].apply(lambda x: c in x).sum() for c in precompute.USER_COUNTRIES])
+    countries = rng.choice(precompute.USER_COUNTRIES, size=count, p=country_counts / country_counts.sum())
+
+    # Runtimes come from titles of the same type.
+    runtimes = np.empty(count, dtype=int)
+    for user_type in precompute.USER_TYPES:
+        mask = types == user_type
+        runtimes[mask] = rng.choice(df.loc[df['type'] == user_type, 'runtime'].to_numpy(), size=mask.sum())
+
+    genre_p = genres.sum(axis=0) / genres.sum()
+    sizes = rng.integers(1, max_genres + 1, size=count)
+    genre_mask = np.zeros((count, genres.shape[1]), dtype=bool)
+    for i, size in enumerate(sizes):
+        genre_mask[i, rng.choice(genres.shape[1], size=size, replace=False, p=genre_p)] = True
+    genre_lists = [[precompute.GENRE_KEYWORDS[j] for j in np.flatnonzero(row)] for row in genre_mask]
+
+    return {'type': types, 'country': countries, 'runtime': runtimes, 'genres': genre_mask, 'genre_lists': genre_lists}
+
+# =============================================================================
+# Engines
+# =============================================================================
+
+def run_live(df, tfidf, profiles, num_results, similarity_weight):
+    """
+    Rank every profile with recommend_movies(), one query at a time.
+
+    Returns:
+        tuple: An (n x num_results) array of catalog positions (-1 where fewer
+        results came back) and the per-query latencies in seconds.
+    """
+    count = len(profiles['type'])
+    results = np.full((count, num_results), -1, dtype=int)
+    latencies = np.empty(count)
+    for i in range(count):
+        start = time.perf_counter()
+        recommendations = final.recommend_movies(df, tfidf, profiles['type'][i], profiles['genre_lists'][i],
+                                                 profiles['runtime'][i], profiles['country'][i],
+                                                 num_results=num_results, similarity_weight=similarity_weight)
+        latencies[i] = time.perf_counter() - start
+        positions = df.index.get_indexer(recommendations.index)
+        results[i, :len(positions)] = positions
+    return results, latencies
+
+def run_batched(df, tfidf, profiles, num_results, similarity_weight):
+    """
+    Rank profiles in batches: every profile sharing a (type, country, runtime)
+    cell is scored with a single matrix product via precompute.rank_cell().
+
+    Returns:
+        tuple: Same as run_live(); each query is charged an equal share of its
+        batch's time.
+    """
+    count = len(profiles['type'])
+    results = np.full((count, num_results), -1, dtype=int)
+    latencies = np.empty(count)
+
+    batches = {}
+    for i, cell in enumerate(zip(profiles['type'], profiles['country'], profiles['runtime'])):
+        batches.setdefault(cell, []).append(i)
+
+    for (user_type, user_country, user_runtime), members in batches.items():
+        start = time.perf_counter()
+        candidates = precompute.candidate_items(df, user_type, user_runtime, user_country, num_results)
+        if not candidates.empty:
+            user_tfidf = tfidf.transform([' '.join(profiles['genre_lists'][i]) for i in members]).toarray()
+            top = precompute.rank_cell(candidates, user_tfidf, num_results, similarity_weight)
+            positions = df.index.get_indexer(candidates.index)[top]
+            results[members, :positions.shape[1]] = positions
+        latencies[members] = (time.perf_counter() - start) / len(members)
+    return results, latencies
+
+ENGINES = {'live': run_live, 'batched': run_batched}
+
+# =============================================================================
+# Vectorized Metrics
+# =============================================================================
+
+def candidate_mask(df, profiles, rows, num_results):
+    """
+    Return a (profiles x items) mask of the titles each profile could be shown,
+    mirroring the type/country/runtime filters in recommend_movies().
+    """
+    item_type = df['type'].to_numpy()
+    item_runtime = df['runtime'].to_numpy()
+    in_country = {c: df['production_countries'].apply(lambda x: c in x).to_numpy() for c in precompute.USER_COUNTRIES}
+
+    country = np.where((profiles['country'][rows] == 'US')[:, None], in_country['US'][None, :], in_country['IN'][None, :])
+    base = (profiles['type'][rows][:, None] == item_type[None, :]) & country
+    strict = base & (np.abs(item_runtime[None, :] - profiles['runtime'][rows][:, None]) <= 30)
+
+    # Drop the runtime constraint where it leaves too few titles.
+    return np.where((strict.sum(axis=1) >= num_results)[:, None], strict, base)
+
+def ndcg(results, relevance, candidates):
+    """
+    nDCG of each result list, with the ideal ordering taken from the titles
+    that passed the profile's filters.
+    """
+    num_results = results.shape[1]
+    discounts = 1.0 / np.log2(np.arange(num_results) + 2)
+
+    gains = np.where(results >= 0, relevance[results], 0.0)
+    dcg = gains @ discounts
+
+    pool = np.where(candidates, relevance[None, :], 0.0)
+    kth = min(num_results, pool.shape[1]) - 1
+    # The partition holds the negated top relevances; sorting them ascending
+    # and negating gives the ideal gains, best first.
+    ideal = -np.sort(np.partition(-pool, kth, axis=1)[:, :num_results], axis=1)
+    idcg = ideal @ discounts[:ideal.shape[1]]
+    return np.divide(dcg, idcg, out=np.zeros_like(dcg), where=idcg > 0)
+
+def evaluate(df, genres, profiles, results, chunk_size=500):
+    """
+    Compute ranking-quality metrics for a batch of result lists.
+
+    Returns:
+        dict: Genre hit-rate, nDCG against IMDB and TMDB scores, catalog
+        coverage and intra-list genre diversity.
+    """
+    valid = results >= 0
+    safe = np.where(valid, results, 0)
+
+    # Share of recommended items carrying at least one requested genre.
+    hits = (genres[safe] & profiles['genres'][:, None, :]).any(axis=2)
+    hit_rate = hits[valid].mean() if valid.any() else 0.0
+
+    # 1 - mean pairwise cosine similarity of the genre vectors in each list.
+    norms = np.linalg.norm(genres, axis=1, keepdims=True)
+    unit = np.divide(genres, norms, out=np.zeros(genres.shape), where=norms > 0)
+    vectors = unit[safe] * valid[:, :, None]
+    similarity = np.einsum('nkg,nlg->nkl', vectors, vectors)
+    pairs = valid[:, :, None] & valid[:, None, :] & ~np.eye(results.shape[1], dtype=bool)
+    pair_counts = pairs.sum(axis=(1, 2))
+    diversity = 1 - (similarity * pairs).sum(axis=(1, 2))[pair_counts > 0] / pair_counts[pair_counts > 0]
+
+    imdb = df['imdb_score'].fillna(0).to_numpy(dtype=float) / 10
+    tmdb = df['tmdb_score'].fillna(0).to_numpy(dtype=float) / 10
+    ndcg_imdb, ndcg_tmdb = [], []
+    for start in range(0, len(results), chunk_size):
+        rows = np.arange(start, min(start + chunk_size, len(results)))
+        candidates = candidate_mask(df, profiles, rows, results.shape[1])
+        ndcg_imdb.append(ndcg(results[rows], imdb, candidates))
+        ndcg_tmdb.append(ndcg(results[rows], tmdb, candidates))
+
+    return {
+        'genre_hit_rate': float(hit_rate),
+        'ndcg_imdb': float(np.concatenate(ndcg_imdb).mean()),
+        'ndcg_tmdb': float(np.concatenate(ndcg_tmdb).mean()),
+        'coverage': float(np.unique(results[valid]).size / len(df)),
+        'diversity': float(diversity.mean()) if diversity.size else 0.0,
+    }
+
+# =============================================================================
+# Main Function
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ranking quality against per-query cost.")
+    parser.add_argument('--data', default='titles.csv', help="Path to the titles CSV file.")
+    parser.add_argument('--profiles', type=int, default=2000, help="Number of synthetic preference profiles.")
+    parser.add_argument('--max-genres', type=int, default=2, help="Most genres in a single profile.")
+    parser.add_argument('--engines', default='live,batched', help=f"Comma-separated engines: {', '.join(ENGINES)}.")
+    parser.add_argument('--weights', default='0.7', help="Comma-separated similarity weights to try.")
+    parser.add_argument('--num-results', type=int, default=5)
+    parser.add_argument('--output', help="Also write the results to this JSON file.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    df, tfidf = final.load_data(args.data)
+    genres = genre_matrix(df)
+    profiles = generate_profiles(df, genres, args.profiles, args.max_genres, args.seed)
+
+    rows = []
+    for engine in args.engines.split(','):
+        for weight in [float(w) for w in args.weights.split(',')]:
+            results, latencies = ENGINES[engine](df, tfidf, profiles, args.num_results, weight)
+            row = {'engine': engine, 'similarity_weight': weight}
+            row.update(evaluate(df, genres, profiles, results))
+            row['p50_ms'], row['p95_ms'] = (float(v) for v in np.percentile(latencies * 1000, [50, 95]))
+            rows.append(row)
+
+    header = (f"{'Engine':<8} | {'Weight':^6} | {'p50 ms':^8} | {'p95 ms':^8} | {'Hit rate':^8} | "
+              f"{'nDCG IMDB':^9} | {'nDCG TMDB':^9} | {'Coverage':^8} | {'Diversity':^9}")
+    print(f"\nEvaluated {args.profiles} profiles, top {args.num_results}")
+    print("-" * len(header))
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['engine']:<8} | {row['similarity_weight']:^6.2f} | {row['p50_ms']:^8.2f} | {row['p95_ms']:^8.2f} | "
+              f"{row['genre_hit_rate']:^8.3f} | {row['ndcg_imdb']:^9.3f} | {row['ndcg_tmdb']:^9.3f} | "
+              f"{row['coverage']:^8.3f} | {row['diversity']:^9.3f}")
+    print("-" * len(header))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'profiles': args.profiles, 'num_results': args.num_results, 'results': rows}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
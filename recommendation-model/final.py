@@ -1,14 +1,23 @@
 import pandas as pd
+import numpy as np
+import argparse
 import ast
+import os
 import re
+import signal
+import threading
 import time
 import sys
 import requests
+from collections import deque, namedtuple
 
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.preprocessing import MinMaxScaler
 
+import precompute
+import search
+
 # =============================================================================
 # Data Loading and Recommendation Functions
 # =============================================================================
@@ -41,7 +50,7 @@ def load_data(filepath):
     
     return df, tfidf
 
-def recommend_movies(df, tfidf, user_type, user_genres, user_runtime, user_country, num_results=10):
+def recommend_movies(df, tfidf, user_type, user_genres, user_runtime, user_country, num_results=10, similarity_weight=0.7):
     """
     Recommend movies or shows based on user preferences:
       - Filter by type (movie or show).
@@ -57,6 +66,8 @@ def recommend_movies(df, tfidf, user_type, user_genres, user_runtime, user_count
         user_runtime (int): The preferred runtime (in minutes).
         user_country (str): The production country preference.
         num_results (int): The number of results to return.
+        similarity_weight (float): Weight of the similarity score; the IMDB
+            score gets the remainder.
         
     Returns:
         DataFrame: A DataFrame with the top recommended items.
@@ -95,10 +106,11 @@ def recommend_movies(df, tfidf, user_type, user_genres, user_runtime, user_count
     # Normalize the similarity and IMDB scores.
     scaler = MinMaxScaler()
     normalized_scores = scaler.fit_transform(filtered[['similarity_score', 'imdb_score']].fillna(0))
-    filtered['final_score'] = 0.7 * normalized_scores[:, 0] + 0.3 * normalized_scores[:, 1]
+    filtered['final_score'] = similarity_weight * normalized_scores[:, 0] + (1 - similarity_weight) * normalized_scores[:, 1]
     
-    # Return the top N items sorted by the final score.
-    filtered = filtered.sort_values(by='final_score', ascending=False)
+    # Return the top N items sorted by the final score (stable, so ties keep
+    # catalog order exactly like the precomputed table).
+    filtered = filtered.sort_values(by='final_score', ascending=False, kind='mergesort')
     return filtered.head(num_results)
 
 # =============================================================================
@@ -211,69 +223,268 @@ def print_recommendations(recommendations, user_type):
     print(separator)
 
 
+# =============================================================================
+# API Client Loop
+# =============================================================================
+
+def process_once(df, tfidf, table, api_url_get, api_url_post, http=requests, last_sent=None):
+    """
+    Run one fetch -> rank -> post round trip against the API.
+
+    Parameters:
+        df (DataFrame): The dataset containing movies/shows.
+        tfidf (TfidfVectorizer): The fitted TF-IDF vectorizer.
+        table (dict): The precomputed lookup table, or None.
+        api_url_get (str): Endpoint returning the saved questionsAndKeywords.
+        api_url_post (str): Endpoint that receives the recommendations.
+        http: The `requests` module or a `requests.Session` to send with.
+        last_sent (dict): When given, remembers the last payload answered so a
+            long-running loop does not answer the same responses twice.
+
+    Returns:
+        bool: True if recommendations were sent to the API.
+    """
+    # Fetch user preference data from the API
+    response = http.get(api_url_get, timeout=10)  # Set timeout for responsiveness
+    response.raise_for_status()  # Raise error for bad responses
+    
+    api_data = response.json()
+
+    # /api/get-responses wraps the responses in a questionsAndKeywords field.
+    if isinstance(api_data, dict):
+        api_data = api_data.get('questionsAndKeywords', [])
+
+    if not api_data:
+        print("No data received from API. Waiting for the next attempt...")
+        return False
+
+    # Compare the unwrapped responses, which is also what gets remembered below.
+    if last_sent is not None and last_sent.get('payload') == api_data:
+        return False
+
+    print("\nFetched Preferences from API:", api_data)
+
+    # Transform API data into a structured preferences dictionary
+    preferences = transform_preferences(api_data)
+    print("Transformed Preferences:", preferences)
+    
+    # Extract values to match recommend_movies() parameters
+    user_type = preferences['type']
+    user_genres = [genre.strip() for genre in preferences['genres'].split(',')]
+    user_runtime = preferences['runtime']
+    user_country = preferences['production_countries']
+    
+    # Answer covered preferences from the table, rank the rest live.
+    recommendations_json = precompute.lookup_recommendations(table, user_type, user_genres, user_runtime, user_country, num_results=5)
+    if recommendations_json is None:
+        recommendations = recommend_movies(df, tfidf, user_type, user_genres, user_runtime, user_country, num_results=5)
+        # Convert recommendations to JSON-friendly format
+        recommendations_json = [] if recommendations.empty else recommendations[precompute.RECORD_COLUMNS].to_dict(orient='records')
+    
+    if not recommendations_json:
+        print("No recommendations found based on the current preferences.")
+        return False
+
+    print("\nGenerated Recommendations:")
+    for rec in recommendations_json:
+        print(f"Title: {rec['title']}, Type: {rec['type']}, Runtime: {rec['runtime']} min, "
+              f"Country: {', '.join(rec['production_countries'])}, Genres: {', '.join(rec['genres'])}, "
+              f"IMDB Score: {rec['imdb_score']}")
+    
+    print("\nSending recommendations to API...")
+
+    # Echo the request id back when the server tags its responses (mock_server.py does).
+    headers = {}
+    if response.headers.get('X-Request-Id'):
+        headers['X-Request-Id'] = response.headers['X-Request-Id']
+
+    # Send recommendations to the API
+    post_response = http.post(api_url_post, json=recommendations_json, headers=headers, timeout=10)
+    post_response.raise_for_status()  # Raise error if POST request fails
+    print("Recommendations successfully sent to API. Response:")
+    print(post_response.json())
+
+    if last_sent is not None:
+        last_sent['payload'] = api_data
+    return True
+
+# =============================================================================
+# Catalog Hot Reload
+# =============================================================================
+
+# One consistent version of the catalog and everything derived from it.
+# `search` is None until a caller has asked for the SearchIndex.
+CatalogSnapshot = namedtuple('CatalogSnapshot', ['df', 'tfidf', 'table', 'search'], defaults=(None,))
+
+class CatalogIndex:
+    """
+    Double-buffered holder for the loaded catalog.
+
+    Requests take a CatalogSnapshot with current() and keep using it until
+    they finish. reload() builds the replacement in a background thread and
+    swaps it in with a single reference assignment, so requests are served
+    from the old index for the whole rebuild. The title SearchIndex is built
+    lazily on the first search_index() call; after that every rebuild also
+    builds a new one and swaps it in as part of the snapshot.
+    """
+
+    def __init__(self, filepath, table=None, table_path=precompute.DEFAULT_TABLE_PATH):
+        self.filepath = filepath
+        self.table_path = table_path
+        df, tfidf = load_data(filepath)
+        self._snapshot = CatalogSnapshot(df, tfidf, table)
+        self._search = None
+        self._mtime = os.path.getmtime(filepath)
+        self._reload_lock = threading.Lock()
+        self._reloading = threading.Event()
+        self._steady_latencies = deque(maxlen=1000)
+        self._reload_latencies = []
+
+    def current(self):
+        """
+        Return the CatalogSnapshot to serve a request from.
+        """
+        return self._snapshot
+
+    def search_index(self):
+        """
+        Return the SearchIndex for the current snapshot, building it on first
+        use so processes that never search never pay for it.
+        """
+        snapshot = self._snapshot
+        if snapshot.search is not None:
+            return snapshot.search
+        cached = self._search
+        if cached is None or cached[0] is not snapshot:
+            cached = (snapshot, search.SearchIndex(snapshot.df, snapshot.tfidf))
+            self._search = cached
+        return cached[1]
+
+    def reload(self):
+        """
+        Start rebuilding the index in the background.
+
+        Returns:
+            bool: False if a rebuild is already running.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        self._reloading.set()
+        threading.Thread(target=self._rebuild, daemon=True).start()
+        return True
+
+    def _rebuild(self):
+        start = time.perf_counter()
+        mtime = None
+        try:
+            mtime = os.path.getmtime(self.filepath)
+            fingerprint = precompute.catalog_fingerprint(self.filepath)
+            df, tfidf = load_data(self.filepath)
+
+            # A precomputed table describes the old catalog; rebuild it to match
+            # and write it back so the next restart does not load the stale one.
+            table = self._snapshot.table
+            if table is not None:
+                table = precompute.build_table(df, tfidf, table['max_genres'], table['num_results'], fingerprint)
+                precompute.save_table(table, self.table_path)
+
+            # Once search is in use, build its index off the request path too.
+            index = search.SearchIndex(df, tfidf) if self._search is not None else None
+
+            self._snapshot = CatalogSnapshot(df, tfidf, table, index)
+            self._mtime = mtime
+            print(f"Catalog reloaded from {self.filepath} in {time.perf_counter() - start:.1f}s ({len(df)} titles).")
+        except Exception as e:
+            print(f"Catalog reload failed, keeping the current index: {e}")
+            # Remember the failed version so the watcher waits for the next change.
+            if mtime is not None:
+                self._mtime = mtime
+        finally:
+            self._reloading.clear()
+            self._report_latencies()
+            self._reload_lock.release()
+
+    def record_latency(self, seconds):
+        """
+        Record how long a request took, attributing it to a reload if one was running.
+        """
+        if self._reloading.is_set():
+            self._reload_latencies.append(seconds)
+        else:
+            self._steady_latencies.append(seconds)
+
+    def _report_latencies(self):
+        def summary(samples):
+            if not samples:
+                return "no requests"
+            p50, p95 = np.percentile(np.asarray(samples) * 1000, [50, 95])
+            return f"{len(samples)} requests, p50 {p50:.1f} ms, p95 {p95:.1f} ms"
+
+        print(f"Request latency during reload: {summary(self._reload_latencies)}")
+        print(f"Request latency before reload: {summary(self._steady_latencies)}")
+        self._reload_latencies = []
+
+    def watch(self, interval=2.0):
+        """
+        Reload whenever the dataset file changes or the process receives SIGHUP.
+
+        A change is only picked up once the file's modification time has been
+        stable for one interval, so a half-copied CSV is never loaded.
+        """
+        def poll():
+            seen = self._mtime
+            while True:
+                time.sleep(interval)
+                try:
+                    mtime = os.path.getmtime(self.filepath)
+                except OSError:
+                    continue
+                if mtime != self._mtime and mtime == seen:
+                    self.reload()
+                seen = mtime
+
+        threading.Thread(target=poll, daemon=True).start()
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, lambda signum, frame: self.reload())
+
 # =============================================================================
 # Main Function with Dummy Data for Testing
 # =============================================================================
 def main():
+    parser = argparse.ArgumentParser(description="Serve recommendations for the responses saved in gemini-server.")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep running after answering and hot-reload the catalog when it changes (or on SIGHUP).")
+    parser.add_argument('--reload-interval', type=float, default=2.0, help="Seconds between dataset file checks.")
+    args = parser.parse_args()
 
     print("Script Started...")
 
-    # Load movie/show data from CSV
+    # Load movie/show data from CSV, with the precomputed lookup table if precompute.py has been run.
     filepath = 'titles.csv'  # Replace with your actual file path if needed
-    df, tfidf = load_data(filepath)
+    table = precompute.load_table(fingerprint=precompute.catalog_fingerprint(filepath))
+    catalog = CatalogIndex(filepath, table)
+    if table is not None:
+        print(f"Loaded precomputed table with {len(table['cells'])} cells.")
+    if args.watch:
+        catalog.watch(args.reload_interval)
 
     # Define API endpoints (adjust these URLs as needed)
     api_url_get = "http://localhost:5000/api/get-responses"  # Fetch user responses
     api_url_post = "http://localhost:5000/api/data"           # Send recommendations
+    last_sent = {} if args.watch else None
     
     while True:
         try:
-            # Fetch user preference data from the APIj
-            response = requests.get(api_url_get, timeout=10)  # Set timeout for responsiveness
-            response.raise_for_status()  # Raise error for bad responses
-            
-            api_data = response.json()
-            if api_data:
-                print("\nFetched Preferences from API:", api_data)
-                
-                # Transform API data into a structured preferences dictionary
-                preferences = transform_preferences(api_data)
-                print("Transformed Preferences:", preferences)
-                
-                # Extract values to match recommend_movies() parameters
-                user_type = preferences['type']
-                user_genres = [genre.strip() for genre in preferences['genres'].split(',')]
-                user_runtime = preferences['runtime']
-                user_country = preferences['production_countries']
-                
-                # Get recommendations
-                recommendations = recommend_movies(df, tfidf, user_type, user_genres, user_runtime, user_country, num_results=5)
-                
-                if recommendations.empty:
-                    print("No recommendations found based on the current preferences.")
-                    recommendations_json = []
-                else:
-                    # Convert recommendations to JSON-friendly format
-                    recommendations_json = recommendations[['title', 'type', 'runtime', 'production_countries', 'genres', 'imdb_score']].to_dict(orient='records')
-                    print("\nGenerated Recommendations:")
-                    for rec in recommendations_json:
-                        print(f"Title: {rec['title']}, Type: {rec['type']}, Runtime: {rec['runtime']} min, "
-                              f"Country: {', '.join(rec['production_countries'])}, Genres: {', '.join(rec['genres'])}, "
-                              f"IMDB Score: {rec['imdb_score']}")
-                    
-                    print("\nSending recommendations to API...")
-
-                    # Send recommendations to the API
-                    post_response = requests.post(api_url_post, json=recommendations_json, timeout=10)
-                    post_response.raise_for_status()  # Raise error if POST request fails
-                    print("Recommendations successfully sent to API. Response:")
-                    print(post_response.json())
-
-                    # Exit loop after successful processing
-                    sys.exit()
-            
-            else:
-                print("No data received from API. Waiting for the next attempt...")
+            # Serve the whole request from one snapshot, even if a reload swaps it meanwhile.
+            snapshot = catalog.current()
+            start = time.perf_counter()
+            sent = process_once(snapshot.df, snapshot.tfidf, snapshot.table, api_url_get, api_url_post, last_sent=last_sent)
+            if sent:
+                catalog.record_latency(time.perf_counter() - start)
+
+            # Exit loop after successful processing
+            if sent and not args.watch:
+                sys.exit()
 
         except requests.exceptions.RequestException as e:
             print(f"API request error: {e}")
@@ -284,4 +495,3 @@ def main():
 if __name__ == "__main__":
     main()
 
-
@@ -0,0 +1,200 @@
+import argparse
+import contextlib
+import os
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+import final
+import precompute
+from mock_server import MockState, start_server
+
+# =============================================================================
+# Realistic Questionnaire Payloads
+# =============================================================================
+
+# The questions asked by watchparty-client/src/components/WatchParty.jsx.
+QUESTIONS = [
+    "Alright, let’s start with the basics. Are you in the mood for a quick movie or a binge-worthy show?",
+    "Now, tell me—how are you feeling right now? Your mood sets the tone for the kind of experience you’ll love.",
+    "Alright, let’s talk genres. What are you in the mood for? Something thriller, romantic, or maybe a comedy?",
+    "Do you have a preference for where the content comes from? Are we talking Hollywood or Bollywood?",
+    "One last thing—how much time do you have? Are you up for something epic, or do you need a shorter watch? just tell in minutes"
+]
+
+# Spoken answers to choose from for each question.
+ANSWERS = [
+    ["a movie please", "I want a show to binge", "let's do a movie", "maybe a show"],
+    ["I'm happy", "kind of sad today", "pretty relaxed", "really excited", "bored"],
+    ["thriller", "comedy and romance", "something with action", "a drama", "horror or thriller",
+     "scifi", "an animation for the family", "crime drama", "documentation"],
+    ["Hollywood", "Bollywood", "hollywood please", "I'd say Bollywood"],
+    ["90 minutes", "about 120", "I have 60 minutes", "150", "30 minutes", "no idea"]
+]
+
+def random_responses(rng):
+    """
+    Build one questionnaire submission in /api/save-responses format.
+    """
+    return [{'question': question, 'answer': rng.choice(answers)} for question, answers in zip(QUESTIONS, ANSWERS)]
+
+# =============================================================================
+# Load Generation
+# =============================================================================
+
+def percentiles(samples):
+    """
+    Summarise latency samples (seconds) as p50/p95/p99 in milliseconds.
+    """
+    if not samples:
+        return "n/a"
+    p50, p95, p99 = np.percentile(np.asarray(samples) * 1000, [50, 95, 99])
+    return f"p50 {p50:.1f} ms | p95 {p95:.1f} ms | p99 {p99:.1f} ms"
+
+def run_worker(df, tfidf, table, base_url, poll_interval, stop, round_trips, failures):
+    """
+    Drive final.py's client loop until `stop` is set, recording the latency of
+    every round trip that sent recommendations and every unexpected error.
+
+    Like final.py --watch, each worker skips responses it has already
+    answered, so duplicates only count genuine double answers.
+    """
+    session = requests.Session()
+    last_sent = {}
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            if final.process_once(df, tfidf, table, f"{base_url}/api/get-responses", f"{base_url}/api/data",
+                                  http=session, last_sent=last_sent):
+                round_trips.append(time.perf_counter() - start)
+        except requests.exceptions.RequestException:
+            pass
+        except Exception as e:
+            # Keep the worker alive so one bad payload does not hide the rest.
+            failures.append(f"{type(e).__name__}: {e}")
+        stop.wait(poll_interval)
+
+def generate_load(base_url, rate, duration, seed, save_latencies, save_errors):
+    """
+    Submit questionnaires to /api/save-responses at `rate` requests per second
+    for `duration` seconds.
+
+    Returns:
+        tuple: The number of submissions and the seconds the arrival schedule
+        spanned, excluding the wait for backed-up saves to finish.
+    """
+    rng = random.Random(seed)
+
+    def save(responses):
+        start = time.perf_counter()
+        try:
+            response = requests.post(f"{base_url}/api/save-responses", json={'responses': responses}, timeout=10)
+            response.raise_for_status()
+            save_latencies.append(time.perf_counter() - start)
+        except requests.exceptions.RequestException:
+            save_errors.append(1)
+
+    submitted = int(rate * duration)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        start = time.perf_counter()
+        for i in range(submitted):
+            # Keep a fixed arrival schedule even when individual saves are slow.
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(save, random_responses(rng))
+        # The last arrival owns one full interval of the schedule.
+        window = time.perf_counter() - start + 1 / rate
+    return submitted, window
+
+def report(state, submitted, load_duration, save_latencies, save_errors, round_trips, failures):
+    """
+    Print offered vs. achieved rate, tail latency, dropped/duplicated result
+    counts and worker failures.
+    """
+    delivered = {}
+    duplicated = 0
+    for request_id, delivered_at in state.deliveries:
+        if request_id in delivered:
+            duplicated += 1
+        else:
+            delivered[request_id] = delivered_at
+
+    end_to_end = [delivered[request_id] - state.saved[request_id] for request_id in delivered if request_id in state.saved]
+    dropped = len(state.saved) - len(end_to_end)
+
+    # Achieved throughput covers first save to last delivery, not the idle drain.
+    window = max(delivered.values()) - min(state.saved.values()) if end_to_end else 0.0
+    throughput = len(end_to_end) / window if window > 0 else 0.0
+
+    print("\nLoad Test Report")
+    print("================")
+    print(f"Mode:                {'queue' if state.queue_mode else 'single slot (server.js)'}")
+    print(f"Saved questionnaires: {len(state.saved)} ({len(save_errors)} failed)")
+    print(f"Delivered (unique):   {len(end_to_end)}")
+    print(f"Dropped:              {dropped}")
+    print(f"Duplicated:           {duplicated}")
+    print(f"Offered rate:         {submitted / load_duration:.1f} req/s over {load_duration:.1f}s")
+    print(f"Throughput:           {throughput:.1f} results/s over {window:.1f}s (first save to last delivery)")
+    print(f"Worker failures:      {len(failures)}")
+    for message, count in Counter(failures).most_common(3):
+        print(f"    {count} x {message}")
+    print(f"save-responses:       {percentiles(save_latencies)}")
+    print(f"Worker round trip:    {percentiles(round_trips)}")
+    print(f"End to end:           {percentiles(end_to_end)}")
+
+# =============================================================================
+# Main Function
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the save -> rank -> post loop against a local mock server.")
+    parser.add_argument('--data', default='titles.csv', help="Path to the titles CSV file.")
+    parser.add_argument('--rate', type=float, default=20.0, help="Questionnaires saved per second.")
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds to generate load for.")
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent final.py client loops.")
+    parser.add_argument('--poll-interval', type=float, default=0.05, help="Seconds each worker waits between polls.")
+    parser.add_argument('--drain', type=float, default=5.0, help="Seconds to keep workers running after the load stops.")
+    parser.add_argument('--queue', action='store_true', help="Hand each saved response to exactly one worker.")
+    parser.add_argument('--keyword-latency', type=float, default=0.0, help="Simulated Gemini latency in seconds.")
+    parser.add_argument('--no-table', action='store_true', help="Ignore the precomputed table and always rank live.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    df, tfidf = final.load_data(args.data)
+    table = None if args.no_table else precompute.load_table(fingerprint=precompute.catalog_fingerprint(args.data))
+
+    # Bind to an ephemeral local port so nothing leaves the machine.
+    state = MockState(queue_mode=args.queue, keyword_latency=args.keyword_latency)
+    server = start_server(state, port=0)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"Mock server on {base_url}; {args.workers} workers; {args.rate:g} req/s for {args.duration:g}s")
+
+    stop = threading.Event()
+    save_latencies, save_errors, round_trips, failures = [], [], [], []
+
+    # final.py reports every step on stdout; keep the report readable.
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        workers = [
+            threading.Thread(target=run_worker, args=(df, tfidf, table, base_url, args.poll_interval, stop, round_trips, failures))
+            for _ in range(args.workers)
+        ]
+        for worker in workers:
+            worker.start()
+
+        submitted, load_duration = generate_load(base_url, args.rate, args.duration, args.seed, save_latencies, save_errors)
+        time.sleep(args.drain)
+        stop.set()
+        for worker in workers:
+            worker.join()
+
+    server.shutdown()
+    report(state, submitted, load_duration, save_latencies, save_errors, round_trips, failures)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import argparse
+import itertools
+import json
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# =============================================================================
+# Keyword Extraction Stand-in
+# =============================================================================
+
+# Words the Gemini prompt reliably turns into keywords for each question.
+KNOWN_KEYWORDS = [
+    'movie', 'show', 'happy', 'sad', 'relaxed', 'excited', 'bored', 'romantic',
+    'action', 'animation', 'comedy', 'crime', 'documentation', 'drama',
+    'european', 'family', 'fantasy', 'history', 'horror', 'music', 'reality',
+    'romance', 'scifi', 'sport', 'thriller', 'war', 'western',
+    'hollywood', 'bollywood'
+]
+
+def extract_keywords(answer):
+    """
+    Extract bracketed keywords from a single answer the way the Gemini prompt
+    in gemeni.js does, without calling the Gemini API.
+    """
+    words = re.findall(r'[a-z0-9]+', answer.lower())
+    keywords = [f"[{word}]" for word in words if word in KNOWN_KEYWORDS]
+    keywords += [f"{number} minutes" for number in re.findall(r'\d+', answer)]
+    return keywords
+
+def extract_keywords_batch(responses):
+    """
+    Map every question/answer pair onto a questionsAndKeywords entry.
+    """
+    return [
+        {'question': response.get('question', ''), 'keywords': extract_keywords(response.get('answer', ''))}
+        for response in responses
+    ]
+
+# =============================================================================
+# Mock gemini-server
+# =============================================================================
+
+class MockState:
+    """
+    In-memory state mirroring server.js, plus bookkeeping for load tests.
+
+    In the default mode there is a single keyword-mapping slot that every
+    save overwrites and every get returns, exactly like keywordMappingCache.
+    In queue mode each save is queued and handed out to one get only.
+    """
+
+    def __init__(self, queue_mode=False, keyword_latency=0.0):
+        self.queue_mode = queue_mode
+        self.keyword_latency = keyword_latency
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.cache = None
+        self.pending = deque()
+        self.stored_data = []
+        self.saved = {}
+        self.deliveries = []
+
+    def save(self, responses):
+        # Simulate the round trip to Gemini outside the lock.
+        if self.keyword_latency:
+            time.sleep(self.keyword_latency)
+        mapping = extract_keywords_batch(responses)
+
+        with self.lock:
+            request_id = str(next(self.ids))
+            self.saved[request_id] = time.perf_counter()
+            entry = (request_id, mapping)
+            if self.queue_mode:
+                self.pending.append(entry)
+            else:
+                self.cache = entry
+        return request_id, mapping
+
+    def get(self):
+        with self.lock:
+            if self.queue_mode:
+                return self.pending.popleft() if self.pending else None
+            return self.cache
+
+    def store(self, data, request_id):
+        with self.lock:
+            self.stored_data = data
+            self.deliveries.append((request_id, time.perf_counter()))
+
+def make_handler(state):
+    """
+    Build a request handler class bound to `state`.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status, body, headers=None):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def read_json(self):
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                return json.loads(self.rfile.read(length) or b'null')
+            except json.JSONDecodeError:
+                return None
+
+        def do_GET(self):
+            if self.path == '/api/get-responses':
+                entry = state.get()
+                if entry is None:
+                    return self.send_json(404, {'error': "No responses found. Please save responses first."})
+                request_id, mapping = entry
+                return self.send_json(200, {'questionsAndKeywords': mapping}, {'X-Request-Id': request_id})
+            if self.path == '/api/data':
+                return self.send_json(200, {'data': state.stored_data})
+            if self.path == '/api/test':
+                return self.send_json(200, "Node.js is working!")
+            self.send_json(404, {'error': 'Not found'})
+
+        def do_POST(self):
+            body = self.read_json()
+            if self.path == '/api/save-responses':
+                responses = body.get('responses') if isinstance(body, dict) else None
+                if not isinstance(responses, list):
+                    return self.send_json(400, {'error': "Invalid request body. Expecting 'responses' array."})
+                request_id, mapping = state.save(responses)
+                return self.send_json(200, {'questionsAndKeywords': mapping}, {'X-Request-Id': request_id})
+            if self.path == '/api/data':
+                if not isinstance(body, list):
+                    return self.send_json(400, {'error': "Invalid input. Expected an array."})
+                state.store(body, self.headers.get('X-Request-Id'))
+                return self.send_json(200, {'message': "Data received and stored successfully."})
+            self.send_json(404, {'error': 'Not found'})
+
+    return Handler
+
+def start_server(state, host='127.0.0.1', port=5000):
+    """
+    Start the mock server on a background thread and return it.
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+# =============================================================================
+# Main Function
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for gemini-server; needs no network or API key.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--queue', action='store_true', help="Hand each saved response to exactly one reader.")
+    parser.add_argument('--keyword-latency', type=float, default=0.0, help="Simulated Gemini latency in seconds.")
+    args = parser.parse_args()
+
+    server = start_server(MockState(args.queue, args.keyword_latency), args.host, args.port)
+    print(f"Mock server is running on http://{args.host}:{args.port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
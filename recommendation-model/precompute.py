@@ -0,0 +1,237 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+# =============================================================================
+# Questionnaire Space
+# =============================================================================
+
+# transform_preferences() only ever produces these types and countries.
+USER_TYPES = ['MOVIE', 'SHOW']
+USER_COUNTRIES = ['US', 'IN']
+
+# Genre keywords that match the catalog's own genre labels.
+GENRE_KEYWORDS = [
+    'action', 'animation', 'comedy', 'crime', 'documentation', 'drama',
+    'european', 'family', 'fantasy', 'history', 'horror', 'music', 'reality',
+    'romance', 'scifi', 'sport', 'thriller', 'war', 'western'
+]
+
+# Runtime answers ("just tell in minutes") almost always land on these values.
+RUNTIME_BUCKETS = [30, 45, 60, 90, 120, 150, 180]
+
+# Columns sent to /api/data for every recommended item.
+RECORD_COLUMNS = ['title', 'type', 'runtime', 'production_countries', 'genres', 'imdb_score']
+
+DEFAULT_TABLE_PATH = 'recommendations_table.json'
+
+# =============================================================================
+# Lookup Keys
+# =============================================================================
+
+def make_key(user_type, user_country, user_runtime, user_genres):
+    """
+    Build the lookup key for a single preference cell.
+
+    Genres are sorted so that the same set of answers maps onto the same cell
+    regardless of the order in which the user said them.
+    """
+    genres = ','.join(sorted(user_genres))
+    return f"{user_type}|{user_country}|{int(user_runtime)}|{genres}"
+
+def genre_combinations(max_genres):
+    """
+    Enumerate every distinct combination of genre keywords with at most
+    `max_genres` entries.
+    """
+    for size in range(1, max_genres + 1):
+        for combo in itertools.combinations(GENRE_KEYWORDS, size):
+            yield list(combo)
+
+# =============================================================================
+# Batched Ranking
+# =============================================================================
+
+def candidate_items(df, user_type, user_runtime, user_country, num_results):
+    """
+    Select the candidate rows for one (type, country, runtime) cell using the
+    same filters and runtime fallback as recommend_movies().
+    """
+    by_type = df[df['type'] == user_type]
+    by_country = by_type[by_type['production_countries'].apply(lambda x: user_country in x)]
+    filtered = by_country[by_country['runtime'].between(user_runtime - 30, user_runtime + 30)]
+
+    # If not enough items are found, drop the runtime constraint.
+    if len(filtered) < num_results:
+        filtered = by_country
+    return filtered
+
+def min_max_columns(matrix):
+    """
+    Min-max normalise every column of `matrix` independently, using the same
+    arithmetic as MinMaxScaler (constant columns map to zero) so that scores
+    tie exactly where recommend_movies() sees a tie.
+    """
+    col_min = matrix.min(axis=0)
+    col_range = matrix.max(axis=0) - col_min
+    col_range[col_range == 0] = 1.0
+    scale = 1.0 / col_range
+    return matrix * scale + (-col_min * scale)
+
+def rank_cell(candidates, user_tfidf, num_results, similarity_weight=0.7):
+    """
+    Rank the candidates of one cell for a whole batch of genre queries at once.
+
+    Parameters:
+        candidates (DataFrame): Rows returned by candidate_items().
+        user_tfidf (ndarray): One TF-IDF row per genre query.
+        num_results (int): The number of results to keep per query.
+        similarity_weight (float): Weight of the similarity score; the IMDB
+            score gets the remainder.
+
+    Returns:
+        ndarray: A (queries x num_results) array of positional indices into
+        `candidates`, best first.
+    """
+    item_matrix = np.vstack(candidates['tfidf_matrix'].values)
+
+    # Each column holds one query's similarity to every candidate.
+    similarity = cosine_similarity(item_matrix, user_tfidf)
+    imdb = candidates['imdb_score'].fillna(0).to_numpy(dtype=float)
+
+    # Blend exactly like recommend_movies(): weighted similarity + IMDB score.
+    imdb_norm = min_max_columns(imdb.reshape(-1, 1))
+    final_score = similarity_weight * min_max_columns(similarity) + (1 - similarity_weight) * imdb_norm
+
+    order = np.argsort(-final_score, axis=0, kind='stable')
+    return order[:num_results].T
+
+def catalog_fingerprint(filepath):
+    """
+    Hash the catalog file so a table can be matched to the data it was built from.
+    """
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def build_table(df, tfidf, max_genres=2, num_results=5, fingerprint=None):
+    """
+    Enumerate the questionnaire space and rank every cell.
+
+    Parameters:
+        df (DataFrame): The dataset returned by load_data().
+        tfidf (TfidfVectorizer): The fitted TF-IDF vectorizer.
+        max_genres (int): The largest genre combination to precompute.
+        num_results (int): The number of results to store per cell.
+        fingerprint (str): catalog_fingerprint() of the file `df` was loaded from.
+
+    Returns:
+        dict: A JSON-serialisable table with shared item records and a
+        key -> item id list mapping for every cell.
+    """
+    combos = list(genre_combinations(max_genres))
+    user_tfidf = tfidf.transform([' '.join(combo) for combo in combos]).toarray()
+
+    cells = {}
+    used_ids = set()
+    for user_type, user_country, user_runtime in itertools.product(USER_TYPES, USER_COUNTRIES, RUNTIME_BUCKETS):
+        candidates = candidate_items(df, user_type, user_runtime, user_country, num_results)
+        if candidates.empty:
+            continue
+
+        ids = candidates['id'].to_numpy()
+        top = rank_cell(candidates, user_tfidf, num_results)
+        for combo, row in zip(combos, top):
+            top_ids = ids[row].tolist()
+            cells[make_key(user_type, user_country, user_runtime, combo)] = top_ids
+            used_ids.update(top_ids)
+
+    # Store every referenced item once and let the cells point at it by id.
+    items = df[df['id'].isin(used_ids)].set_index('id')[RECORD_COLUMNS]
+    return {
+        'fingerprint': fingerprint,
+        'num_results': num_results,
+        'max_genres': max_genres,
+        'items': items.to_dict(orient='index'),
+        'cells': cells,
+    }
+
+# =============================================================================
+# Serving Helpers
+# =============================================================================
+
+def load_table(path=DEFAULT_TABLE_PATH, fingerprint=None):
+    """
+    Load a precomputed table, returning None if it has not been generated or,
+    when `fingerprint` is given, if it was built from a different catalog.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        table = json.load(f)
+    if fingerprint is not None and table.get('fingerprint') != fingerprint:
+        print(f"Ignoring {path}: it was built from a different catalog. Rerun precompute.py.")
+        return None
+    return table
+
+def save_table(table, path=DEFAULT_TABLE_PATH):
+    """
+    Write a table compactly, replacing any previous file atomically.
+    """
+    with open(path + '.tmp', 'w') as f:
+        json.dump(table, f, separators=(',', ':'))
+    os.replace(path + '.tmp', path)
+
+def lookup_recommendations(table, user_type, user_genres, user_runtime, user_country, num_results=5):
+    """
+    Answer a preference from the precomputed table.
+
+    Returns:
+        list or None: The recommendation records in /api/data format, or None
+        if the preference is not covered and must be ranked live.
+    """
+    # candidate_items() drops the runtime filter based on num_results, so a
+    # table built for a different size ranks a different candidate set.
+    if table is None or num_results != table['num_results']:
+        return None
+
+    key = make_key(user_type.upper().strip(), user_country.upper().strip(), user_runtime, user_genres)
+    ids = table['cells'].get(key)
+    if ids is None:
+        return None
+    return [table['items'][item_id] for item_id in ids]
+
+# =============================================================================
+# Main Function
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute recommendations for the whole questionnaire space.")
+    parser.add_argument('--data', default='titles.csv', help="Path to the titles CSV file.")
+    parser.add_argument('--output', default=DEFAULT_TABLE_PATH, help="Where to write the lookup table.")
+    parser.add_argument('--max-genres', type=int, default=2, help="Largest genre combination to enumerate.")
+    parser.add_argument('--num-results', type=int, default=5, help="Recommendations stored per cell.")
+    args = parser.parse_args()
+
+    # Imported here because final imports this module for its serving path.
+    import final
+
+    start = time.perf_counter()
+    fingerprint = catalog_fingerprint(args.data)
+    df, tfidf = final.load_data(args.data)
+    table = build_table(df, tfidf, max_genres=args.max_genres, num_results=args.num_results, fingerprint=fingerprint)
+    save_table(table, args.output)
+
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {len(table['cells'])} cells and {len(table['items'])} items to {args.output} in {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
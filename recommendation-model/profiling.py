@@ -0,0 +1,187 @@
+import argparse
+import cProfile
+import io
+import json
+import linecache
+import os
+import pstats
+import random
+import time
+import tracemalloc
+
+import final
+from loadtest import random_responses
+from mock_server import extract_keywords_batch
+
+# =============================================================================
+# Stage Profiling
+# =============================================================================
+
+# Allocations are attributed to the innermost frame inside this directory.
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def repo_allocation_sites(snapshot, top):
+    """
+    Group traced allocations by the innermost line of this repo's code on
+    their stack, so sites point at e.g. the .toarray() call in final.py rather
+    than the scipy internals that performed the allocation.
+
+    Returns:
+        list: (filename, lineno, size_bytes, count) tuples, largest first.
+    """
+    sites = {}
+    for stat in snapshot.statistics('traceback'):
+        # Frames are ordered oldest first; walk back from the allocation.
+        frame = next((f for f in reversed(list(stat.traceback)) if f.filename.startswith(REPO_DIR)), None)
+        key = (frame.filename, frame.lineno) if frame else ('<outside repo>', 0)
+        size, count = sites.get(key, (0, 0))
+        sites[key] = (size + stat.size, count + stat.count)
+    ranked = sorted(sites.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return [(filename, lineno, size, count) for (filename, lineno), (size, count) in ranked]
+
+def profile_stage(name, func, report_dir, track_memory=True, top=25):
+    """
+    Run `func` under cProfile (and tracemalloc) and write its reports.
+
+    Writes <name>.prof (loadable with pstats or snakeviz), <name>.txt with the
+    top functions by cumulative time and, when memory is tracked,
+    <name>_alloc.txt with the top allocation sites.
+
+    Returns:
+        tuple: The value returned by `func` and a summary dict for the stage.
+    """
+    if track_memory:
+        # Deep enough to reach from pandas/scipy internals back to our code.
+        tracemalloc.start(40)
+        tracemalloc.reset_peak()
+
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        result = func()
+    except BaseException:
+        # Leave no tracing running behind a failed stage.
+        if track_memory:
+            tracemalloc.stop()
+        raise
+    finally:
+        profiler.disable()
+    wall_time = time.perf_counter() - start
+
+    summary = {'stage': name, 'wall_time_s': round(wall_time, 4)}
+
+    profiler.dump_stats(os.path.join(report_dir, f"{name}.prof"))
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(top)
+    with open(os.path.join(report_dir, f"{name}.txt"), 'w') as f:
+        f.write(stream.getvalue())
+
+    if track_memory:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        summary['peak_memory_mb'] = round(peak / 2**20, 2)
+        summary['retained_memory_mb'] = round(current / 2**20, 2)
+        with open(os.path.join(report_dir, f"{name}_alloc.txt"), 'w') as f:
+            for filename, lineno, size, count in repo_allocation_sites(snapshot, top):
+                source = linecache.getline(filename, lineno).strip()
+                f.write(f"{os.path.relpath(filename, REPO_DIR)}:{lineno}: size={size / 1024:.1f} KiB, "
+                        f"count={count}\n    {source}\n")
+
+    return result, summary
+
+# =============================================================================
+# Preference Replay
+# =============================================================================
+
+def generate_profiles(count, seed):
+    """
+    Build `count` questionsAndKeywords payloads from simulated questionnaires.
+    """
+    rng = random.Random(seed)
+    return [extract_keywords_batch(random_responses(rng)) for _ in range(count)]
+
+def load_profiles(path):
+    """
+    Load recorded questionsAndKeywords payloads, one JSON value per line.
+
+    Lines may hold the bare list or the {'questionsAndKeywords': [...]}
+    envelope returned by /api/get-responses; both are unwrapped the same way
+    process_once() does.
+    """
+    payloads = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            payload = json.loads(line)
+            if isinstance(payload, dict):
+                payload = payload.get('questionsAndKeywords')
+            if not isinstance(payload, list):
+                raise ValueError(f"{path}:{number}: expected a questionsAndKeywords list")
+            payloads.append(payload)
+    return payloads
+
+def recommend_all(df, tfidf, preferences, num_results):
+    """
+    Run recommend_movies() for every transformed preference dictionary.
+    """
+    results = []
+    for prefs in preferences:
+        user_genres = [genre.strip() for genre in prefs['genres'].split(',')]
+        results.append(final.recommend_movies(df, tfidf, prefs['type'], user_genres, prefs['runtime'],
+                                              prefs['production_countries'], num_results=num_results))
+    return results
+
+# =============================================================================
+# Main Function
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile load_data and recommend_movies stage by stage.")
+    parser.add_argument('--data', default='titles.csv', help="Path to the titles CSV file.")
+    parser.add_argument('--report-dir', default='profile_report', help="Directory to write the reports to.")
+    parser.add_argument('--profiles', type=int, default=200, help="Number of simulated preference profiles to replay.")
+    parser.add_argument('--profiles-file', help="Replay recorded questionsAndKeywords payloads (JSON lines) instead.")
+    parser.add_argument('--num-results', type=int, default=5)
+    parser.add_argument('--no-memory', action='store_true', help="Skip tracemalloc, which slows every stage down.")
+    parser.add_argument('--top', type=int, default=25, help="Rows to keep in each text report.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.report_dir, exist_ok=True)
+    payloads = load_profiles(args.profiles_file) if args.profiles_file else generate_profiles(args.profiles, args.seed)
+    track_memory = not args.no_memory
+    summaries = []
+
+    (df, tfidf), summary = profile_stage('load_data', lambda: final.load_data(args.data),
+                                         args.report_dir, track_memory, args.top)
+    summaries.append(summary)
+
+    preferences, summary = profile_stage('transform_preferences',
+                                         lambda: [final.transform_preferences(payload) for payload in payloads],
+                                         args.report_dir, track_memory, args.top)
+    summaries.append(summary)
+
+    _, summary = profile_stage('recommend_movies',
+                               lambda: recommend_all(df, tfidf, preferences, args.num_results),
+                               args.report_dir, track_memory, args.top)
+    summary['per_query_ms'] = round(summary['wall_time_s'] * 1000 / max(len(preferences), 1), 3)
+    summaries.append(summary)
+
+    with open(os.path.join(args.report_dir, 'summary.json'), 'w') as f:
+        json.dump({'profiles': len(payloads), 'memory_tracked': track_memory, 'stages': summaries}, f, indent=2)
+
+    print(f"\nProfile Summary ({len(payloads)} profiles)")
+    print("=" * 40)
+    for summary in summaries:
+        line = f"{summary['stage']:<22} {summary['wall_time_s']:>8.3f}s"
+        if track_memory:
+            line += f"  peak {summary['peak_memory_mb']:>8.2f} MB"
+        print(line)
+    print(f"\nReports written to {args.report_dir}/")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import argparse
+import bisect
+import re
+import time
+import unicodedata
+
+import numpy as np
+
+# =============================================================================
+# Normalisation
+# =============================================================================
+
+def normalize_title(text):
+    """
+    Lowercase, strip accents and punctuation and collapse whitespace so that
+    "Amélie!" and "amelie" share a key.
+    """
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(re.findall(r'[a-z0-9]+', text.lower()))
+
+# =============================================================================
+# Search Index
+# =============================================================================
+
+class SearchIndex:
+    """
+    Title autocomplete and keyword search over the loaded catalog.
+
+    - Prefix lookups use a sorted array of normalised title keys. Every word
+      of a title starts one key, so "godf" finds "The Godfather". Each lookup
+      is a bisect plus a slice.
+    - Keyword search uses a term -> (rows, weights) inverted index over title
+      and description. It reuses the fitted TF-IDF vocabulary and weights.
+    - Type and country filters are posting lists of their own, intersected
+      with the candidate rows.
+    """
+
+    def __init__(self, df, tfidf):
+        popularity = df['tmdb_popularity'].fillna(0).to_numpy(dtype=float)
+        self.records = df[['id', 'title', 'type', 'release_year', 'imdb_score']].to_dict(orient='records')
+
+        # Prefix structure: one key per word position, sorted once.
+        entries = []
+        for row, title in enumerate(df['title'].fillna('')):
+            words = normalize_title(title).split()
+            for start in range(len(words)):
+                entries.append((' '.join(words[start:]), row))
+        entries.sort()
+        self.prefix_keys = [key for key, _ in entries]
+        self.prefix_rows = np.array([row for _, row in entries], dtype=np.int32)
+
+        # Rank prefix matches by popularity, most popular first.
+        self.popularity_rank = np.empty(len(df), dtype=np.int32)
+        self.popularity_rank[np.argsort(-popularity, kind='stable')] = np.arange(len(df), dtype=np.int32)
+
+        # Token-level inverted index built with the catalog's TF-IDF vocabulary.
+        text = df['title'].fillna('') + " " + df['description'].fillna('')
+        postings = tfidf.transform(text).tocsc()
+        self.analyzer = tfidf.build_analyzer()
+        self.vocabulary = tfidf.vocabulary_
+        self.term_rows = np.split(postings.indices, postings.indptr[1:-1])
+        self.term_weights = np.split(postings.data, postings.indptr[1:-1])
+
+        # Facet posting lists for type and production country filters.
+        self.facets = {}
+        for row, (item_type, countries) in enumerate(zip(df['type'], df['production_countries'])):
+            self.facets.setdefault(f"type:{item_type}", []).append(row)
+            for country in countries:
+                self.facets.setdefault(f"country:{country}", []).append(row)
+        self.facets = {key: np.array(rows, dtype=np.int32) for key, rows in self.facets.items()}
+
+    def _filter_mask(self, rows, user_type=None, user_country=None):
+        """
+        Return a boolean mask over `rows` keeping those in every requested facet.
+        """
+        mask = np.ones(len(rows), dtype=bool)
+        for key in (user_type and f"type:{user_type.upper().strip()}",
+                    user_country and f"country:{user_country.upper().strip()}"):
+            if key:
+                mask &= np.isin(rows, self.facets.get(key, np.empty(0, dtype=np.int32)))
+        return mask
+
+    def prefix(self, query, limit=10, user_type=None, user_country=None):
+        """
+        Return up to `limit` titles with a word starting with `query`.
+
+        Parameters:
+            query (str): What the user has typed so far.
+            limit (int): The maximum number of suggestions.
+            user_type (str): Optional "MOVIE" or "SHOW" filter.
+            user_country (str): Optional production country filter.
+
+        Returns:
+            list: Catalog records, most popular first.
+        """
+        key = normalize_title(query)
+        if not key:
+            return []
+
+        lo = bisect.bisect_left(self.prefix_keys, key)
+        hi = bisect.bisect_left(self.prefix_keys, key + '\uffff', lo)
+        rows = np.unique(self.prefix_rows[lo:hi])
+        rows = rows[self._filter_mask(rows, user_type, user_country)]
+
+        rows = rows[np.argsort(self.popularity_rank[rows])][:limit]
+        return [self.records[row] for row in rows]
+
+    def search(self, query, limit=10, user_type=None, user_country=None):
+        """
+        Rank titles by the summed TF-IDF weight of the query terms in their
+        title and description.
+
+        Returns:
+            list: (record, score) pairs, best match first.
+        """
+        term_ids = {self.vocabulary[token] for token in self.analyzer(query) if token in self.vocabulary}
+        if not term_ids:
+            return []
+
+        rows = np.concatenate([self.term_rows[term] for term in term_ids])
+        weights = np.concatenate([self.term_weights[term] for term in term_ids])
+        rows, inverse = np.unique(rows, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+
+        mask = self._filter_mask(rows, user_type, user_country)
+        rows, scores = rows[mask], scores[mask]
+
+        order = np.argsort(-scores, kind='stable')[:limit]
+        return [(self.records[rows[i]], float(scores[i])) for i in order]
+
+# =============================================================================
+# Main Function
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the title search index from the command line.")
+    parser.add_argument('query', help="Title prefix or keywords to look up.")
+    parser.add_argument('--data', default='titles.csv', help="Path to the titles CSV file.")
+    parser.add_argument('--keywords', action='store_true', help="Run a keyword search instead of a prefix lookup.")
+    parser.add_argument('--type', dest='user_type', help="Only return MOVIE or SHOW results.")
+    parser.add_argument('--country', dest='user_country', help="Only return titles produced in this country.")
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    # Imported here because final builds SearchIndex for its catalog snapshots.
+    import final
+
+    df, tfidf = final.load_data(args.data)
+    start = time.perf_counter()
+    index = SearchIndex(df, tfidf)
+    print(f"Built search index over {len(index.records)} titles in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    if args.keywords:
+        results = index.search(args.query, args.limit, args.user_type, args.user_country)
+    else:
+        results = [(record, None) for record in index.prefix(args.query, args.limit, args.user_type, args.user_country)]
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    for record, score in results:
+        suffix = f"  ({score:.3f})" if score is not None else ""
+        print(f"{record['title']:<40} | {record['type']:^6} | {record['release_year']}{suffix}")
+    print(f"\n{len(results)} results in {elapsed_ms:.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,29 @@
+import argparse
+import json
+import os
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler, LabelEncoder
-from tensorflow.keras.models import Model
+from tensorflow.keras.models import Model, load_model
 from tensorflow.keras.layers import Dense, Embedding, Flatten, Dropout, Concatenate, Input
-from tensorflow.keras.callbacks import EarlyStopping
+from tensorflow.keras.callbacks import EarlyStopping, LambdaCallback
 import tensorflow as tf
+# Parse command line options
+parser = argparse.ArgumentParser(description="Train the movie recommender model.")
+parser.add_argument('--epochs', type=int, default=30, help="Epochs when training from scratch.")
+parser.add_argument('--warm-start-epochs', type=int, default=10, help="Epochs when warm-starting from the previous model.")
+parser.add_argument('--model', default='movie_recommender_model.h5', help="Where to save (and warm-start from) the model.")
+parser.add_argument('--no-warm-start', action='store_true', help="Always train from scratch.")
+parser.add_argument('--checkpoint-dir', default='checkpoints', help="Directory for resumable checkpoints.")
+parser.add_argument('--checkpoint-every', type=int, default=1, help="Save a checkpoint every N epochs.")
+parser.add_argument('--threads', type=int, default=os.cpu_count(), help="Intra-op CPU threads.")
+parser.add_argument('--inter-op-threads', type=int, default=2, help="Inter-op CPU threads.")
+args = parser.parse_args()
+if args.checkpoint_every < 1:
+    parser.error("--checkpoint-every must be at least 1")
+# Size the CPU thread pools before TensorFlow initialises its runtime
+tf.config.threading.set_intra_op_parallelism_threads(args.threads)
+tf.config.threading.set_inter_op_parallelism_threads(args.inter_op_threads)
 # Load datasets
 titles = pd.read_csv('../datasets/titles.csv')
 credits = pd.read_csv('../datasets/credits.csv')
@@ -26,6 +45,23 @@ scaler = StandardScaler()
 titles['runtime'] = scaler.fit_transform(titles[['runtime']])
 # Select relevant columns
 movies = titles[['type', 'genres', 'production_countries', 'runtime', 'age_certification']]
+# Describe the encodings so later runs can map the old weights onto new data
+metadata = {
+    'ids': titles['id'].tolist(),
+    'classes': {col: le.classes_.tolist() for col, le in label_encoders.items()}
+}
+def metadata_path(model_path):
+    return os.path.splitext(model_path)[0] + '.meta.json'
+def load_json(path):
+    # A missing or unreadable file (e.g. truncated by a crash) counts as absent
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+def save_metadata(path):
+    with open(path, 'w') as f:
+        json.dump(metadata, f)
 # Define model parameters
 embedding_dim = 50
 # Input layers
@@ -35,10 +71,10 @@ production_countries_input = Input(shape=(1,), name='production_countries')
 runtime_input = Input(shape=(1,), name='runtime')
 age_certification_input = Input(shape=(1,), name='age_certification')
 # Embedding layers
-type_embedding = Embedding(input_dim=len(label_encoders['type'].classes_), output_dim=embedding_dim)(type_input)
-genres_embedding = Embedding(input_dim=len(label_encoders['genres'].classes_), output_dim=embedding_dim)(genres_input)
-production_countries_embedding = Embedding(input_dim=len(label_encoders['production_countries'].classes_), output_dim=embedding_dim)(production_countries_input)
-age_certification_embedding = Embedding(input_dim=len(label_encoders['age_certification'].classes_), output_dim=embedding_dim)(age_certification_input)
+type_embedding = Embedding(input_dim=len(label_encoders['type'].classes_), output_dim=embedding_dim, name='type_embedding')(type_input)
+genres_embedding = Embedding(input_dim=len(label_encoders['genres'].classes_), output_dim=embedding_dim, name='genres_embedding')(genres_input)
+production_countries_embedding = Embedding(input_dim=len(label_encoders['production_countries'].classes_), output_dim=embedding_dim, name='production_countries_embedding')(production_countries_input)
+age_certification_embedding = Embedding(input_dim=len(label_encoders['age_certification'].classes_), output_dim=embedding_dim, name='age_certification_embedding')(age_certification_input)
 # Flatten embeddings
 type_flatten = Flatten()(type_embedding)
 genres_flatten = Flatten()(genres_embedding)
@@ -53,16 +89,73 @@ combined = Concatenate()([
     runtime_input
 ])
 # Dense layers
-x = Dense(128, activation='relu')(combined)
+x = Dense(128, activation='relu', name='hidden_1')(combined)
 x = Dropout(0.2)(x)
-x = Dense(64, activation='relu')(x)
+x = Dense(64, activation='relu', name='hidden_2')(x)
 x = Dropout(0.2)(x)
-output = Dense(len(movies), activation='softmax')(x)
+output = Dense(len(movies), activation='softmax', name='output')(x)
 # Compile model
 model = Model(inputs=[
     type_input, genres_input, production_countries_input, runtime_input, age_certification_input
 ], outputs=output)
 model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+# Resume from the latest checkpoint if a previous run on the same data was interrupted
+epochs = args.epochs
+initial_epoch = 0
+os.makedirs(args.checkpoint_dir, exist_ok=True)
+checkpoint_state = os.path.join(args.checkpoint_dir, 'state.json')
+state = load_json(checkpoint_state)
+checkpoint_model = os.path.join(args.checkpoint_dir, state['model']) if state and 'model' in state else None
+if state and state['metadata'] == metadata and checkpoint_model and os.path.exists(checkpoint_model):
+    model = load_model(checkpoint_model)
+    epochs = state['epochs']
+    initial_epoch = state['epoch']
+    print(f"Resuming from checkpoint at epoch {initial_epoch}/{epochs}")
+else:
+    # Otherwise warm-start from the previous model when rows or labels were only added
+    previous = None if args.no_warm_start else load_json(metadata_path(args.model))
+    if previous and os.path.exists(args.model) and set(previous['ids']) <= set(metadata['ids']):
+        old_model = load_model(args.model)
+        # Layers whose shapes did not change are copied as they are
+        for name in ['hidden_1', 'hidden_2']:
+            model.get_layer(name).set_weights(old_model.get_layer(name).get_weights())
+        # Embedding rows follow their label, since LabelEncoder renumbers classes when new ones appear
+        for col in label_encoders:
+            old_rows = old_model.get_layer(f'{col}_embedding').get_weights()[0]
+            new_rows = model.get_layer(f'{col}_embedding').get_weights()[0]
+            old_index = {label: i for i, label in enumerate(previous['classes'][col])}
+            for i, label in enumerate(metadata['classes'][col]):
+                if label in old_index:
+                    new_rows[i] = old_rows[old_index[label]]
+            model.get_layer(f'{col}_embedding').set_weights([new_rows])
+        # Output units follow their title id; new titles keep their fresh initialisation
+        old_kernel, old_bias = old_model.get_layer('output').get_weights()
+        new_kernel, new_bias = model.get_layer('output').get_weights()
+        old_index = {title_id: i for i, title_id in enumerate(previous['ids'])}
+        pairs = [(i, old_index[title_id]) for i, title_id in enumerate(metadata['ids']) if title_id in old_index]
+        new_positions, old_positions = (np.array(p) for p in zip(*pairs))
+        new_kernel[:, new_positions] = old_kernel[:, old_positions]
+        new_bias[new_positions] = old_bias[old_positions]
+        model.get_layer('output').set_weights([new_kernel, new_bias])
+        epochs = args.warm_start_epochs
+        print(f"Warm-starting from {args.model}: {len(metadata['ids']) - len(previous['ids'])} new titles")
+    elif previous:
+        print("Titles were removed since the previous model; training from scratch")
+# Save a checkpoint every few epochs. Each model gets its own file and the state file is
+# replaced atomically to point at it, so a crash never pairs a model with the wrong epoch
+def save_checkpoint(epoch, logs):
+    global checkpoint_model
+    if (epoch + 1) % args.checkpoint_every:
+        return
+    new_model = os.path.join(args.checkpoint_dir, f'epoch-{epoch + 1}.h5')
+    model.save(new_model)
+    with open(checkpoint_state + '.tmp', 'w') as f:
+        json.dump({'epoch': epoch + 1, 'epochs': epochs, 'model': os.path.basename(new_model), 'metadata': metadata}, f)
+    os.replace(checkpoint_state + '.tmp', checkpoint_state)
+    # The state now points at the new model, so the previous one can go
+    if checkpoint_model and checkpoint_model != new_model and os.path.exists(checkpoint_model):
+        os.remove(checkpoint_model)
+    checkpoint_model = new_model
 # Prepare data for training
 X = [
     movies['type'].values,
@@ -74,7 +167,13 @@ X = [
 Y = movies.index.values
 # Train the model
 early_stopping = EarlyStopping(monitor='val_loss', patience=5)
-model.fit(X, Y, epochs=30, batch_size=32, validation_split=0.2, callbacks=[early_stopping])
+checkpoint = LambdaCallback(on_epoch_end=save_checkpoint)
+model.fit(X, Y, epochs=epochs, initial_epoch=initial_epoch, batch_size=32, validation_split=0.2, callbacks=[early_stopping, checkpoint])
 # Save the trained model
-model.save('movie_recommender_model.h5')
-print("Model training complete and saved!")
\ No newline at end of file
+model.save(args.model)
+save_metadata(metadata_path(args.model))
+# Training finished, so the next run should not resume from these checkpoints
+for path in [checkpoint_state, checkpoint_model]:
+    if path and os.path.exists(path):
+        os.remove(path)
+print("Model training complete and saved!")